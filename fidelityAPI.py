@@ -6,10 +6,17 @@
 
 import asyncio
 import os
+import re
+import time
 import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
 
+import pandas as pd
 from dotenv import load_dotenv
-from fidelity import fidelity
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
 
 from helperAPI import (
     Brokerage,
@@ -20,20 +27,1348 @@ from helperAPI import (
     stockOrder,
 )
 
+# The async Playwright driver lives on one dedicated event loop running in a
+# daemon thread. Sync callers submit coroutines to it through _run_async, so
+# any of auto-rsa's broker threads can drive the driver without needing a
+# Playwright instance per thread
+fidelity_loop = asyncio.new_event_loop()
+Thread(target=fidelity_loop.run_forever, daemon=True).start()
+
+
+def _run_async(coro):
+    """
+    Run a coroutine on the Fidelity event loop from any thread and block
+    until it finishes, returning its result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, fidelity_loop).result()
+
+# Cleanup helpers for scraped text: a single C-level pass to strip currency
+# characters and a precompiled regex to collapse whitespace runs
+_CURRENCY_TBL = str.maketrans("", "", "$-")
+_WS_RE = re.compile(r"\s+")
+
+
+# How many order submissions may run at once in separate tabs
+_MAX_CONCURRENT_ORDERS = 4
+
+# Only one account may prompt for and wait on a 2FA code at a time. The
+# Discord waiter takes the next message in the channel, so concurrent
+# prompts would hand one account's code to another.
+_twofa_prompt_lock = Lock()
+
+# How long a scraped account list stays fresh before get_list_of_accounts
+# will hit the transfers page again, in seconds
+_ACCOUNT_LIST_TTL = 300
+
+# Columns the positions csv must contain for getAccountInfo to parse it
+_REQUIRED_POSITION_COLS = frozenset(
+    {
+        "Account Number",
+        "Account Name",
+        "Symbol",
+        "Description",
+        "Quantity",
+        "Last Price",
+        "Last Price Change",
+        "Current Value",
+    }
+)
+
+# Shared Playwright driver and browser. Launching a browser per account is
+# expensive, so each FidelityAutomation gets its own BrowserContext off of
+# one shared browser instead.
+_shared_playwright = None
+_shared_browser = None
+# Serializes the lazy launch; parallel logins interleave create() calls on
+# the shared loop and would otherwise each launch their own browser
+_shared_browser_lock = asyncio.Lock()
+
+
+async def _get_shared_browser(headless: bool = True):
+    """
+    Launch the shared browser if it isn't running yet and return it.
+    The headless flag only applies to the first call since the browser is
+    launched once.
+    """
+    global _shared_playwright, _shared_browser
+    async with _shared_browser_lock:
+        if _shared_browser is not None:
+            return _shared_browser
+        _shared_playwright = await async_playwright().start()
+        _shared_browser = await _shared_playwright.firefox.launch(
+            headless=headless,
+            # Firefox prefs that actually cut rendering work; the trade pages
+            # don't need images, WebGL, or video to fill out forms
+            firefox_user_prefs={
+                "permissions.default.image": 2,
+                "webgl.disabled": True,
+                "media.autoplay.default": 5,
+                "browser.sessionstore.enabled": False,
+                # Background services that only burn CPU and network in an
+                # automated, throwaway profile
+                "app.update.auto": False,
+                "app.update.enabled": False,
+                "browser.shell.checkDefaultBrowser": False,
+                "browser.sessionstore.resume_from_crash": False,
+                "datareporting.healthreport.uploadEnabled": False,
+                "datareporting.policy.dataSubmissionEnabled": False,
+                "toolkit.telemetry.enabled": False,
+                "extensions.update.enabled": False,
+            },
+        )
+        return _shared_browser
+
+
+# Resource types the automation never looks at. Stylesheets stay enabled
+# since the pages rely on them for element visibility.
+_BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+
+
+async def _block_heavy_resources(route):
+    """Abort requests for images, fonts, and media; let everything else through."""
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def shutdown():
+    """
+    Close the shared browser and stop Playwright.
+    Call when completely done with all Fidelity accounts.
+    """
+    global _shared_playwright, _shared_browser
+    if _shared_browser is not None:
+        await _shared_browser.close()
+        _shared_browser = None
+    if _shared_playwright is not None:
+        await _shared_playwright.stop()
+        _shared_playwright = None
+
+
+class FidelityAutomation:
+    """
+    A class to manage and control a playwright webdriver with Fidelity.
+    If you have multiple login sets and want to use cookies, make sure "title" is unique each time you create this class,
+    otherwise the cookies will be overwritten each time.
+
+    All browser interactions run on the async Playwright API so multiple
+    I/O-bound waits (navigation, 2FA timeouts) can be overlapped between accounts.
+    Use `FidelityAutomation.create(...)` to construct an instance since the
+    driver setup must be awaited.
+
+    Parameters
+    ----------
+    headless (bool)
+        If False the browser will be headless.
+    title (str)
+        The title of this session. Used for cookies file is present.
+    save_state (bool)
+        Determine whether to save cookies in a json file.
+    profile_path (str)
+        Path used to store browser session data.
+
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        title: str = None,
+        save_state: bool = True,
+        profile_path: str = ".",
+    ) -> None:
+        """
+        Setup the class. Use `create` to also start the driver since that must be awaited.
+        """
+        # Setup the webdriver
+        self.headless: bool = headless
+        self.title: str = title
+        self.save_state: bool = save_state
+        self.profile_path: str = profile_path
+        # Imported lazily: fidelityAPI is imported at startup even when
+        # Fidelity isn't in use, so keep heavyweight imports off that path
+        from playwright_stealth import StealthConfig
+
+        self.stealth_config = StealthConfig(
+            navigator_languages=False,
+            navigator_user_agent=False,
+            navigator_vendor=False,
+        )
+        # Some class variables
+        self.account_dict: dict = {}
+        # When get_list_of_accounts last scraped the transfers page
+        self._accounts_fetched_at: float = None
+        # Cap on concurrently running order submissions
+        self._order_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_ORDERS)
+        self.browser = None
+        self.context = None
+        self.page = None
+
+    @classmethod
+    async def create(
+        cls,
+        headless: bool = True,
+        title: str = None,
+        save_state: bool = True,
+        profile_path: str = ".",
+    ) -> "FidelityAutomation":
+        """
+        Create an instance and start the driver.
+        This exists because `__init__` cannot await the async driver setup.
+
+        Returns
+        -------
+        FidelityAutomation
+            The created instance with a running driver
+        """
+        self = cls(
+            headless=headless,
+            title=title,
+            save_state=save_state,
+            profile_path=profile_path,
+        )
+        await self.getDriver()
+        return self
+
+    async def getDriver(self):
+        """
+        Initializes the playwright context and page for use in subsequent functions.
+        Creates and applies stealth settings to playwright context wrapper.
+        If self.save_state is set to True, create a storage path for cookies and data
+
+        Returns
+        -------
+        None
+        """
+        # Create or load cookies if save_state is set
+        if self.save_state:
+            self.profile_path = os.path.abspath(self.profile_path)
+            # If title was given
+            if self.title is not None:
+                # Use the title for the json file
+                self.profile_path = os.path.join(
+                    self.profile_path, f"Fidelity_{self.title}.json"
+                )
+            else:
+                # Use default name for json file
+                self.profile_path = os.path.join(self.profile_path, "Fidelity.json")
+            # If the path supplied doesn't exist, make it
+            os.makedirs(os.path.dirname(self.profile_path), exist_ok=True)
+
+        # Get the shared browser, launching it if this is the first account
+        self.browser = await _get_shared_browser(headless=self.headless)
+
+        self.context = await self.browser.new_context(
+            # Load cookies and session data if we have some saved
+            storage_state=self.profile_path
+            if self.save_state and os.path.exists(self.profile_path)
+            else None
+        )
+
+        # Drop heavy downloads at the network layer for every page in this
+        # context; the forms work fine without them
+        await self.context.route("**/*", _block_heavy_resources)
+
+        self.page = await self.context.new_page()
+        # Apply stealth settings
+        from playwright_stealth import stealth_async
+
+        await stealth_async(self.page, self.stealth_config)
+
+    async def get_list_of_accounts(self):
+        """
+        Uses the transfers page's dropdown to obtain the list of accounts.
+        Separates the account number and nickname and places them into `self.account_dict`
+        if not already present
+
+        Post conditions
+        ---------------
+        `self.account_dict` is updated with account numbers and nicknames
+
+        Returns
+        -------
+        account_dict
+            A dictionary of the account information using account numbers as keys. See set_account_dict
+            for more info on how to use this dictionary.
+        """
+        # The account list doesn't change mid-run; if a recent scrape already
+        # populated the dict, hand it back without touching the browser
+        if (
+            self._accounts_fetched_at is not None
+            and time.monotonic() - self._accounts_fetched_at < _ACCOUNT_LIST_TTL
+        ):
+            return self.account_dict
+        try:
+            # Go to the transfers page. Don't wait for the full load event;
+            # the dropdown is usable as soon as the DOM is in
+            await self.page.goto(
+                url="https://digital.fidelity.com/ftgw/digital/transfer/?quicktransfer=cash-shares",
+                wait_until="domcontentloaded",
+            )
+            await self.wait_for_loading_sign()
+
+            # Select the source account from the 'From' dropdown
+            # Parse the options inside the renderer so only the final
+            # nickname/account pairs cross the protocol, in one round trip.
+            # Options look like "Nickname (Z12345678)": split on the last
+            # parenthesis pair and keep entries whose account number is a Z
+            # or digit followed by at least six digits.
+            from_select = self.page.get_by_label("From")
+            await from_select.wait_for(state="visible")
+            parsed_options = await from_select.evaluate(
+                """(select) => {
+                    const out = [];
+                    for (const option of select.options) {
+                        const text = option.textContent;
+                        const open = text.lastIndexOf("(");
+                        const close = text.lastIndexOf(")");
+                        if (open === -1 || close <= open) continue;
+                        const account = text.slice(open + 1, close);
+                        const nickname = text.slice(0, open);
+                        if (!nickname) continue;
+                        if (!/^(?:Z|\\d)\\d{6,}$/.test(account)) continue;
+                        out.push({ account: account, nickname: nickname });
+                    }
+                    return out;
+                }"""
+            )
+
+            # Add to the account dict
+            for entry in parsed_options:
+                account_number = entry["account"]
+                nickname = entry["nickname"]
+                # Create entry if not already there
+                if not self.set_account_dict(
+                    account_num=account_number,
+                    nickname=nickname,
+                ):
+                    # If entry exists, overwrite nickname
+                    self.add_nickname_to_account_dict(
+                        account_num=account_number,
+                        nickname=nickname,
+                        overwrite=True,
+                    )
+
+            self._accounts_fetched_at = time.monotonic()
+            return self.account_dict
+
+        except Exception as e:
+            print(f"An error occurred in get_list_of_accounts: {str(e)}")
+            return None
+
+    def get_stocks_in_account(self, account_number: str) -> dict:
+        """
+        `self.getAccountInfo()` must be called before this to work
+
+        Returns
+        -------
+        all_stock_dict (dict)
+            A dict of stocks that the account has.
+            The dict is keyed by stocks and only has the quantity.
+            `all_stock_dict[stock] = quantity (int)`
+        """
+        if account_number in self.account_dict:
+            all_stock_dict = {}
+            for stock, stock_dict in self.account_dict[account_number][
+                "stocks"
+            ].items():
+                quantity = stock_dict.get("quantity", None)
+                if quantity is not None:
+                    all_stock_dict[stock] = quantity
+
+            return all_stock_dict
+
+        return None
+
+    async def getAccountInfo(self):
+        """
+        Gets account numbers, account names, and account totals by downloading the csv of positions
+        from fidelity.
+        `Note` This will miss accounts that have no holdings! The positions csv doesn't show accounts
+        with only pending activity either. Use `self.get_list_of_accounts` for a full list of accounts.
+
+        Post Conditions:
+            self.account_dict is populated with holdings for each account
+
+        Returns
+        -------
+        account_dict (dict)
+            A dictionary using account numbers as keys. Each key holds a dict which has:
+            ```
+            {
+                'balance': float: Total account balance
+                'nickname': str: The account nickname or default name
+                'stocks': dict: A dictionary keyed by ticker for each stock found. Each value has:
+                    {
+                        'ticker': str: The ticker of the stock held
+                        'quantity': str: The quantity of stocks with 'ticker' held
+                        'last_price': str: The last price of the stock with the $ sign removed
+                        'value': str: The total value of the position
+                    }
+            }
+            ```
+        None
+            If an error occurred
+        """
+        try:
+            # Go to positions page
+            await self.page.wait_for_load_state(state="load")
+            await self.page.goto(
+                "https://digital.fidelity.com/ftgw/digital/portfolio/positions"
+            )
+
+            # This double wait is necessary. If you remove it, I'll kill you
+            await self.wait_for_loading_sign()
+            await self.page.wait_for_timeout(1000)
+            # Sometimes this can take a while to load. Set to 2.5 minutes
+            await self.wait_for_loading_sign(timeout=2.5 * 60 * 1000)
+
+            # Download the positions as a csv #
+            # See if new UI is present
+            new_ui = True
+            try:
+                await self.page.get_by_role("button", name="Available Actions").click(
+                    timeout=8000
+                )
+                async with self.page.expect_download() as download_info:
+                    await self.page.get_by_role("menuitem", name="Download").click()
+                download = await download_info.value
+            except PlaywrightTimeoutError:
+                new_ui = False
+            if not new_ui:
+                try:
+                    # Use the old UI
+                    async with self.page.expect_download() as download_info:
+                        await self.page.get_by_label("Download Positions").click(
+                            timeout=8000
+                        )
+                    download = await download_info.value
+                except PlaywrightTimeoutError:
+                    print("Could not get positions csv")
+                    return None
+            # Playwright already staged the download in a temp dir and cleans
+            # it up when the context closes, so read it in place instead of
+            # copying it next to the script and deleting it afterwards
+            positions_csv = await download.path()
+
+            df = pd.read_csv(positions_csv, encoding="utf-8-sig", dtype=str)
+            # Ensure all fields we want are present
+            if not _REQUIRED_POSITION_COLS.issubset(df.columns):
+                raise Exception("Not enough elements in fidelity positions csv")
+
+            # Drop empty rows, the disclaimer rows at the bottom, and
+            # accounts that start with 'Y' (Fidelity managed)
+            # na=False keeps the NaN rows from poisoning the masks; without it
+            # the ~ on a NaN result raises and kills the whole parse
+            df = df[
+                df["Account Number"].notna()
+                & ~df["Account Number"].str.contains("and", na=False)
+                & ~df["Account Number"].str.startswith("Y", na=False)
+            ]
+
+            # Strip '$' and '-' in a single vectorized pass per column
+            cur_val = df["Current Value"].fillna("").str.replace(r"[\$\-]", "", regex=True)
+            last_price = df["Last Price"].fillna("").str.replace(r"[\$\-]", "", regex=True)
+            last_price_change = df["Last Price Change"].fillna("").str.replace(
+                "$", "", regex=False
+            )
+            quantity = df["Quantity"].fillna("").str.replace("-", "", regex=False)
+            ticker = df["Symbol"].astype(str)
+
+            # Catch any pending activity with special handling
+            cur_val = cur_val.mask(ticker.str.contains("Pending"), last_price_change)
+            # If the value isn't present, drop the row
+            keep = cur_val.str.len() > 0
+            # If the last price isn't available, just use the current value
+            last_price = last_price.where(last_price.str.len() > 0, cur_val)
+            # If the quantity is missing set it to 1 (For SPAXX or any other cash position)
+            quantity = quantity.where(quantity.str.len() > 0, "1")
+
+            # Anything that isn't a number becomes 0
+            positions = pd.DataFrame(
+                {
+                    "account": df["Account Number"],
+                    "nickname": df["Account Name"],
+                    "ticker": ticker,
+                    "quantity": pd.to_numeric(quantity, errors="coerce")
+                    .fillna(0.0)
+                    .astype(float),
+                    "last_price": pd.to_numeric(last_price, errors="coerce")
+                    .fillna(0.0)
+                    .astype(float),
+                    "value": pd.to_numeric(cur_val, errors="coerce")
+                    .fillna(0.0)
+                    .astype(float),
+                }
+            )[keep]
+
+            # Build the account dict one account at a time
+            for account_number, group in positions.groupby("account", sort=False):
+                # tolist() converts the numpy floats back to python floats
+                stock_map = {
+                    t: create_stock_dict(t, q, lp, v)
+                    for t, q, lp, v in zip(
+                        group["ticker"].tolist(),
+                        group["quantity"].tolist(),
+                        group["last_price"].tolist(),
+                        group["value"].tolist(),
+                    )
+                }
+                # Try setting in the account dict without overwrite
+                if not self.set_account_dict(
+                    account_num=account_number,
+                    balance=round(float(group["value"].sum()), 2),
+                    nickname=group["nickname"].iloc[0],
+                    stocks=stock_map,
+                    overwrite=False,
+                ):
+                    # If the account exists already, add to it
+                    for stock in stock_map.values():
+                        self.add_stock_to_account_dict(account_number, stock)
+
+            return self.account_dict
+        except Exception as e:
+            print(f"Error in getAccountInfo: {e}")
+            return None
+
+    def set_account_dict(
+        self,
+        account_num: str,
+        balance: float = None,
+        nickname: str = None,
+        stocks: dict = None,
+        overwrite: bool = False,
+    ):
+        """
+        Create or rewrite (if overwrite=True) an entry in the account_dict.
+        The dictionary is keyed with account numbers such that:
+        ```
+        account_dict["12345678"] =
+        {
+            "balance": balance if balance is not None else 0.0,
+            "nickname": nickname,
+            "stocks": stocks if stocks is not None else {}
+        }
+        ```
+
+        Parameters
+        ----------
+        account_num (str)
+            The account number of a Fidelity account with no parenthesis. Ex: Z12345678
+        balance (float)
+            The balance of the account if present.
+        nickname (str)
+            The nickname of the account. Ex: Individual
+        stocks (dict)
+            A dictionary keyed by ticker that contains stock info. Each value is defined as:
+            ```
+            {
+                'ticker': str,
+                'quantity': float,
+                'last_price': float,
+                'value': float
+            }
+            ```
+        overwrite (bool)
+            Whether to overwrite an existing entry if found.
+
+        Returns
+        -------
+        True
+            If successful
+
+        False
+            If entry exists and overwrite=False or stock list is incorrect
+        """
+        # Overwrite or create new entry
+        if overwrite or account_num not in self.account_dict:
+            # Check stocks first. This returns true is stocks is None
+            if not validate_stocks(stocks):
+                return False
+
+            # Use the info given
+            self.account_dict[account_num] = {
+                "balance": round(balance, 2) if balance is not None else 0.0,
+                "nickname": nickname,
+                "stocks": stocks if stocks is not None else {},
+            }
+            return True
+
+        return False
+
+    def add_stock_to_account_dict(
+        self, account_num: str, stock: dict, overwrite: bool = False
+    ):
+        """
+        Add a stock to the account dict under an account.
+        You can use/import `create_stock_dict` for help.
+
+        Returns
+        -------
+        True
+            If successful
+        False
+            If account doesn't yet exist in account_dict
+        """
+        if not validate_stocks({stock.get("ticker"): stock}):
+            return False
+        if account_num in self.account_dict:
+            if overwrite:
+                self.account_dict[account_num]["stocks"] = {stock["ticker"]: stock}
+                self.account_dict[account_num]["balance"] = round(stock["value"], 2)
+            else:
+                self.account_dict[account_num]["stocks"][stock["ticker"]] = stock
+                self.account_dict[account_num]["balance"] += round(stock["value"], 2)
+            return True
+        return False
+
+    def add_nickname_to_account_dict(
+        self, account_num: str, nickname: str, overwrite: bool = False
+    ):
+        """
+        Add the nickname to the account_dict if it is not set or overwriting
+
+        Returns
+        -------
+        True
+            If successful
+        False
+            If account doesn't yet exist in account_dict
+        """
+        if account_num in self.account_dict and (
+            overwrite or self.account_dict[account_num]["nickname"] is None
+        ):
+            self.account_dict[account_num]["nickname"] = nickname
+            return True
+        return False
+
+    async def save_storage_state(self):
+        """
+        Saves the storage state of the browser to a file.
+
+        This method saves the storage state of the browser to a file so that it can be restored later.
+        This will do nothing if the class object was initialized with save_state=False
+        """
+        if self.save_state:
+            # Playwright writes the file itself, skipping the Python json
+            # serialization round-trip
+            await self.page.context.storage_state(path=self.profile_path)
+
+    async def close_browser(self):
+        """
+        Closes this account's browser context.
+        The shared browser stays up for other accounts; use the module-level
+        `shutdown()` to tear it down when completely done.
+        """
+        # Save cookies
+        await self.save_storage_state()
+        # Only close our context, the browser is shared
+        await self.context.close()
+
+    async def login(
+        self,
+        username: str,
+        password: str,
+        totp_secret: str = None,
+        save_device: bool = True,
+    ) -> bool:
+        """
+        Logs into fidelity using the supplied username and password.
+
+        If totp_secret is missing, the function will use sms code and login_2FA must be called with
+        the code to complete the login
+
+        Parameters
+        ----------
+        username (str)
+            The username of the user.
+        password (str)
+            The password of the user.
+        totp_secret (str)
+            The totp secret, if using, of the user.
+        save_device (bool)
+            Flag to allow fidelity to remember this device.
+
+        Returns
+        -------
+        True, True
+            If completely logged in
+
+        True, False
+            If 2FA is needed which signifies that the initial login attempt was successful but further action is needed to finish logging in.
+
+        False, False
+            Initial login attempt failed.
+        """
+        try:
+            # Warm start: if cookies were restored, try the summary page first
+            # and skip the whole credential flow when the session is still good
+            if self.save_state and os.path.exists(self.profile_path):
+                try:
+                    await self.page.goto(
+                        url="https://digital.fidelity.com/ftgw/digital/portfolio/summary",
+                        timeout=30000,
+                    )
+                    await self.wait_for_loading_sign()
+                    if "summary" in self.page.url:
+                        return (True, True)
+                except PlaywrightTimeoutError:
+                    pass
+
+            # Go to the login page
+            await self.page.goto(
+                url="https://digital.fidelity.com/prgw/digital/login/full-page",
+                timeout=60000,
+            )
+
+            # Login page
+            await self.page.get_by_label("Username", exact=True).click()
+            await self.page.get_by_label("Username", exact=True).fill(username)
+            await self.page.get_by_label("Password", exact=True).click()
+            await self.page.get_by_label("Password", exact=True).fill(password)
+            await self.page.get_by_role("button", name="Log in").click()
+
+            # Wait for loading spinner to go away
+            await self.wait_for_loading_sign()
+            # The first spinner goes away then another one appears. Instead of
+            # sleeping a fixed second, wait for the second spinner to show up
+            # (if it's going to) and then for it to clear
+            try:
+                await self.page.locator(".pvd-spinner__mask-inner").first.wait_for(
+                    state="visible", timeout=2000
+                )
+            except PlaywrightTimeoutError:
+                pass
+            await self.wait_for_loading_sign()
+
+            if "summary" in self.page.url:
+                return (True, True)
+
+            # Check to see if TOTP secret is blank or "NA"
+            totp_secret = None if totp_secret == "NA" else totp_secret
+
+            # If we hit the 2fA page after trying to login
+            if "login" in self.page.url:
+                await self.wait_for_loading_sign()
+                widget = self.page.locator("#dom-widget div").first
+                await widget.wait_for(timeout=5000, state="visible")
+
+                # The 2FA page renders one of several variants. Wait once for
+                # whichever shows up instead of probing each in sequence,
+                # which also avoids probing while the page is still rendering
+                totp_heading = self.page.get_by_role(
+                    "heading", name="Enter the code from your"
+                )
+                authenticator_only = self.page.get_by_text(
+                    "Enter the code from your authenticator app This security code will confirm the"
+                )
+                try_another = self.page.get_by_role("link", name="Try another way")
+                try:
+                    await totp_heading.or_(authenticator_only).or_(
+                        try_another
+                    ).first.wait_for(state="visible", timeout=5000)
+                except PlaywrightTimeoutError:
+                    pass
+
+                # If TOTP secret is provided, we are will use the TOTP key. See if authenticator code prompt is present
+                if totp_secret is not None and await totp_heading.is_visible():
+                    # Get authenticator code
+                    import pyotp
+
+                    code = pyotp.TOTP(totp_secret).now()
+                    # Enter the code
+                    await self.page.get_by_placeholder("XXXXXX").click()
+                    await self.page.get_by_placeholder("XXXXXX").fill(code)
+
+                    # Prevent future OTP requirements
+                    if save_device:
+                        # Check this box. check() only returns once the box is
+                        # checked and raises otherwise, so no readback needed
+                        await self.page.locator("label").filter(
+                            has_text="Don't ask me again on this"
+                        ).check()
+
+                    # Log in with code
+                    await self.page.get_by_role("button", name="Continue").click()
+
+                    # Wait for loading spinner to go away
+                    await self.wait_for_loading_sign()
+
+                    # See if we got to the summary page
+                    await self.page.wait_for_url(
+                        "https://digital.fidelity.com/ftgw/digital/portfolio/summary",
+                        timeout=20000,
+                    )
+
+                    # Got to the summary page, return True
+                    return (True, True)
+
+                # If the authenticator code is the only way but we don't have the secret, return error
+                if await authenticator_only.is_visible():
+                    raise Exception(
+                        "Fidelity needs code from authenticator app but TOTP secret is not provided"
+                    )
+
+                # If the app push notification page is present
+                if await try_another.is_visible():
+                    if save_device:
+                        await self.page.locator("label").filter(
+                            has_text="Don't ask me again on this"
+                        ).check()
+
+                    # Click on alternate verification method to get OTP via text
+                    await try_another.click()
+
+                # Press the Text me button
+                await self.page.get_by_role("button", name="Text me the code").click()
+                await self.page.get_by_placeholder("XXXXXX").click()
+
+                return (True, False)
+
+            # Can't get to summary and we aren't on the login page, idk what's going on
+            raise Exception("Cannot get to login page. Maybe other 2FA method present")
+
+        except PlaywrightTimeoutError:
+            print("Timeout waiting for login page to load or navigate.")
+            return (False, False)
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            traceback.print_exc()
+            return (False, False)
+
+    async def login_2FA(self, code: str, save_device: bool = True):
+        """
+        Completes the 2FA portion of the login using a phone text code.
+
+        Parameters
+        ----------
+        code (str)
+            The one time code sent to the user's phone
+        save_device (bool)
+            Flag to allow fidelity to remember this device.
+
+        Returns
+        -------
+        True (bool)
+            If login succeeded, return true.
+        False (bool)
+            If login failed, return false.
+        """
+        try:
+            await self.page.get_by_placeholder("XXXXXX").fill(code)
+
+            if save_device:
+                # Prevent future OTP requirements
+                await self.page.locator("label").filter(
+                    has_text="Don't ask me again on this"
+                ).check()
+            await self.page.get_by_role("button", name="Submit").click()
+
+            await self.page.wait_for_url(
+                "https://digital.fidelity.com/ftgw/digital/portfolio/summary",
+                timeout=5000,
+            )
+            return True
+
+        except PlaywrightTimeoutError:
+            print("Timeout waiting for login page to load or navigate.")
+            return False
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            traceback.print_exc()
+            return False
+
+    def summary_holdings(self) -> dict:
+        """
+        The getAccountInfo function `MUST` be called before this, otherwise an empty dictionary will be returned.
+        The keys of the outer dictionary are the tickers of the stocks owned.
+        Ex: `unique_stocks['NVDA'] = {'quantity': 2.0, 'last_price': 120.23, 'value': 240.46}`
+
+        Returns
+        -------
+        unique_stocks (dict)
+            A dictionary containing dictionaries for each stock owned across all accounts.
+            ```
+            {
+                'quantity': float: The number of stocks held of 'ticker'
+                'last_price': float: The last price of the stock
+                'value': float: The total value of the stocks held
+            }
+            ```
+        """
+
+        # Quantities and prices are guaranteed to be floats by validate_stocks,
+        # so just accumulate; defaultdict removes the seen/unseen branch
+        unique_stocks = defaultdict(
+            lambda: {"quantity": 0.0, "last_price": 0.0, "value": 0.0}
+        )
+
+        for account in self.account_dict.values():
+            for ticker, stock_dict in account["stocks"].items():
+                entry = unique_stocks[ticker]
+                entry["quantity"] += stock_dict["quantity"]
+                entry["value"] += stock_dict["value"]
+                entry["last_price"] = stock_dict["last_price"]
+
+        return dict(unique_stocks)
+
+    async def transaction(
+        self,
+        stock: str,
+        quantity: float,
+        action: str,
+        account: str,
+        dry: bool = True,
+        limit_price: float = None,
+        page=None,
+    ) -> bool:
+        """
+        Process an order (transaction) using the dedicated trading page. Support extended hour trading.
+
+        When the page is already on the order entry URL the ticket is reset
+        in place, so repeat calls with different stocks don't need a reload.
+
+        For buying:
+            If the price of the security is below $1, it will choose limit order and go off of the last price + a little
+        For selling:
+            Places a market order for the security
+
+        Parameters
+        ----------
+        stock (str)
+            The ticker that represents the security to be traded
+        quantity (float)
+            The amount to buy or sell of the security
+        action (str)
+            This must be 'buy' or 'sell'. It can be in any case state (i.e. 'bUY' is still valid)
+        account (str)
+            The account number to trade under.
+        dry (bool)
+            True for dry (test) run, False for real run.
+        page (Page)
+            The page to run the order in. Defaults to the main page; pass a
+            dedicated page when placing orders concurrently.
+
+        Returns
+        -------
+        (Success (bool), Error_message (str))
+            If the order was successfully placed or tested (for dry runs) then True is
+            returned and Error_message will be None. Otherwise, False will be returned and Error_message will not be None
+        """
+        # When orders run concurrently in multiple tabs, cap how many are in
+        # flight at once to avoid tripping Fidelity's bot detection
+        async with self._order_semaphore:
+            if page is None:
+                page = self.page
+            # Normalize the identifiers once instead of on every use
+            stock = stock.upper()
+            account = account.upper()
+            action_title = action.lower().title()
+            try:
+                # Go to the trade page, or reset the ticket in place if we are
+                # already there; a full navigation re-runs the JS bootstrap
+                await page.wait_for_load_state(state="load")
+                if (
+                    page.url
+                    != "https://digital.fidelity.com/ftgw/digital/trade-equity/index/orderEntry"
+                ):
+                    await page.goto(
+                        "https://digital.fidelity.com/ftgw/digital/trade-equity/index/orderEntry"
+                    )
+                else:
+                    await self._reset_ticket(page)
+
+                # Resolve the locators used more than once up front so each
+                # selector is only built one time per call
+                acct_dropdown = page.locator("#dest-acct-dropdown")
+                account_option = page.get_by_role("option").filter(
+                    has_text=account
+                )
+                symbol_field = page.get_by_label("Symbol")
+                expanded_btn = page.get_by_role("button", name="View expanded ticket")
+                place_order_btn = page.get_by_role(
+                    "button", name="Place order", exact=False
+                )
+                action_option = page.get_by_role(
+                    "option", name=action_title, exact=True
+                )
+
+                # Click on the drop down
+                await acct_dropdown.click()
+
+                if not await account_option.is_visible():
+                    # Reload the page and hit the drop down again
+                    # This is to prevent a rare case where the drop down is empty
+                    print("Reloading...")
+                    await page.reload()
+                    # Click on the drop down
+                    await acct_dropdown.click()
+                # Find the account to trade under
+                await account_option.click()
+
+                # Enter the symbol
+                await symbol_field.click()
+                # Fill in the ticker
+                await symbol_field.fill(stock)
+                # Force the search to use exactly what was entered
+                await symbol_field.press("Enter")
+
+                # Wait for the quote panel to show up with the new symbol.
+                # On the in-place reuse path the previous order's panel may
+                # still be attached, so presence alone could hand back a
+                # stale price; _reset_ticket detaches the old panel and this
+                # wait requires the new ticker in the panel text.
+                await page.locator("#quote-panel").filter(has_text=stock).wait_for(
+                    timeout=5000
+                )
+                # One round-trip: the text is read inside the renderer instead of
+                # resolving a handle first and fetching its text second
+                last_price = await page.eval_on_selector(
+                    "#eq-ticket__last-price > span.last-price", "el => el.textContent"
+                )
+                last_price = last_price.translate(_CURRENCY_TBL)
+
+                # Ensure we are in the expanded ticket
+                if await expanded_btn.is_visible():
+                    await expanded_btn.click()
+                    # Wait for it to take effect
+                    await page.get_by_role("button", name="Calculate shares").wait_for(
+                        timeout=5000
+                    )
+
+                # When enabling extended hour trading
+                extended = False
+                precision = 3
+                # Enable extended hours trading if available
+                if await page.get_by_text("Extended hours trading").is_visible():
+                    extended_toggle = page.get_by_text(
+                        "Extended hours trading: OffUntil 8:00 PM ET"
+                    )
+                    if await extended_toggle.is_visible():
+                        await extended_toggle.check()
+                    extended = True
+                    precision = 2
+
+                # Press the buy or sell button. Title capitalizes the first letter so 'buy' -> 'Buy'
+                await page.locator(".eq-ticket-action-label").click()
+                await action_option.wait_for()
+                await action_option.click()
+
+                # Press the shares text box
+                await page.locator("#eqt-mts-stock-quatity div").filter(
+                    has_text="Quantity"
+                ).click()
+                await page.get_by_text("Quantity", exact=True).fill(str(quantity))
+
+                # If it should be limit
+                if float(last_price) < 1 or extended or limit_price is not None:
+                    # Set if present
+                    if limit_price is not None:
+                        wanted_price = limit_price
+                    # Buy above
+                    elif action_title == "Buy":
+                        difference_price = 0.01 if float(last_price) > 0.1 else 0.0001
+                        wanted_price = round(float(last_price) + difference_price, precision)
+                    # Sell below
+                    else:
+                        difference_price = 0.01 if float(last_price) > 0.1 else 0.0001
+                        wanted_price = round(float(last_price) - difference_price, precision)
+
+                    # Click on the limit default option when in extended hours
+                    await page.locator(
+                        "#dest-dropdownlist-button-ordertype > span:nth-child(1)"
+                    ).click()
+                    await page.get_by_role("option", name="Limit", exact=True).click()
+                    # Enter the limit price
+                    await page.get_by_text("Limit price", exact=True).click()
+                    await page.get_by_label("Limit price").fill(str(wanted_price))
+                # Otherwise its market
+                else:
+                    # Click on the market
+                    await page.locator("#order-type-container-id").click()
+                    await page.get_by_role("option", name="Market", exact=True).click()
+
+                # Continue with the order
+                await page.get_by_role("button", name="Preview order").click()
+                await self.wait_for_loading_sign(page=page)
+
+                # If error occurred
+                try:
+                    await place_order_btn.wait_for(timeout=5000, state="visible")
+                except PlaywrightTimeoutError:
+                    # Error must be present (or really slow page for some reason)
+                    # Grab the error text and close the dialog in a single JS
+                    # hop instead of racing several locators over the protocol
+                    popup = await page.evaluate(
+                        """() => {
+                            let message = "";
+                            const dialog = document.querySelector('[aria-label="Error"]');
+                            if (dialog) {
+                                const divs = Array.from(
+                                    dialog.querySelectorAll("div")
+                                ).filter((d) => d.textContent.includes("critical"));
+                                if (divs.length > 2) {
+                                    message = divs[2].textContent;
+                                }
+                            }
+                            if (!message) {
+                                const alert = document.querySelector(
+                                    '.pvd-inline-alert__content font[color="red"]'
+                                );
+                                if (alert) {
+                                    message = alert.textContent;
+                                }
+                            }
+                            let closed = false;
+                            const close = Array.from(
+                                document.querySelectorAll("button")
+                            ).find(
+                                (b) =>
+                                    (b.getAttribute("aria-label") || b.textContent)
+                                        .trim() === "Close dialog"
+                            );
+                            if (close) {
+                                close.click();
+                                closed = true;
+                            }
+                            return { message: message, closed: closed };
+                        }"""
+                    )
+                    # Return with error and trim it down (it contains many spaces for some reason)
+                    error_message = popup["message"]
+                    if error_message != "":
+                        error_message = (
+                            _WS_RE.sub(" ", error_message).replace("critical", "").strip()
+                        )
+                    else:
+                        error_message = "Could not retrieve error message from popup"
+
+                    # If the error box is still open, reload the page
+                    if not popup["closed"]:
+                        await page.reload()
+                    return (False, error_message)
+
+                # If no error occurred, continue with checking the order preview
+                if (
+                    not await page.locator("preview")
+                    .filter(has_text=account)
+                    .is_visible()
+                    or not await page.get_by_text(
+                        f"Symbol{stock}", exact=True
+                    ).is_visible()
+                    or not await page.get_by_text(
+                        f"Action{action_title}"
+                    ).is_visible()
+                    or not await page.get_by_text(f"Quantity{quantity}").is_visible()
+                ):
+                    return (False, "Order preview is not what is expected")
+
+                # If its a real run
+                if not dry:
+                    await place_order_btn.first.click()
+                    try:
+                        await self.wait_for_loading_sign(page=page)
+                        # See that the order goes through
+                        await page.get_by_text("Order received", exact=True).wait_for(
+                            timeout=10000, state="visible"
+                        )
+                        # If no error, return with success
+                        return (True, None)
+                    except PlaywrightTimeoutError as toe:
+                        # Order didn't go through for some reason, go to the next and say error
+                        return (False, f"Timed out waiting for 'Order received': {toe}")
+                # If its a dry run, report back success
+                return (True, None)
+            except PlaywrightTimeoutError as toe:
+                return (False, f"Driver timed out. Order not complete: {toe}")
+            except Exception as e:
+                return (False, f"Some error occurred: {e}")
+
+    async def _reset_ticket(self, page):
+        """
+        Clear the order ticket left over from a previous transaction so the
+        trade page can be reused without a reload.
+        Waits for the old quote panel to detach so the next quote read can't
+        pick up the previous stock's price.
+        Falls back to a reload if the ticket won't reset.
+        """
+        try:
+            symbol_field = page.get_by_label("Symbol")
+            await symbol_field.click()
+            await symbol_field.fill("")
+            await symbol_field.press("Enter")
+            await page.locator("#quote-panel").wait_for(
+                state="detached", timeout=5000
+            )
+        except Exception:
+            await page.reload()
+
+    async def transact_all_accounts(
+        self, stock: str, quantity: float, action: str, accounts: list, dry: bool = True
+    ) -> dict:
+        """
+        Place the same order for several accounts concurrently, each in its
+        own tab of this account's browser context. The per-instance order
+        semaphore caps how many run at once.
+
+        Parameters are the same as `transaction` except `accounts`, which is
+        a list of account numbers to trade under.
+
+        Returns
+        -------
+        results (dict)
+            Keyed by account number; each value is the (success, error_message)
+            tuple that `transaction` returns.
+        """
+
+        from playwright_stealth import stealth_async
+
+        async def run_one(account):
+            page = await self.context.new_page()
+            try:
+                await stealth_async(page, self.stealth_config)
+                return await self.transaction(
+                    stock, quantity, action, account, dry, page=page
+                )
+            finally:
+                await page.close()
+
+        results = await asyncio.gather(
+            *(run_one(account) for account in accounts), return_exceptions=True
+        )
+        return {
+            account: (
+                result
+                if not isinstance(result, BaseException)
+                else (False, f"Some error occurred: {result}")
+            )
+            for account, result in zip(accounts, results)
+        }
+
+    async def wait_for_loading_sign(self, timeout: int = 30000, page=None):
+        """
+        Waits for known loading signs present in Fidelity.
+        The waits are independent so they all run concurrently with the
+        timeout given; total wait time is the slowest spinner, not the sum.
+
+        Parameters
+        ----------
+        timeout (int)
+            The number of milliseconds to wait before throwing a PlaywrightTimeoutError exception
+        page (Page)
+            The page to watch. Defaults to the main page.
+        """
+        if page is None:
+            page = self.page
+
+        # Wait for all kinds of loading signs
+        signs = [
+            page.locator("div:nth-child(2) > .loading-spinner-mask-after").first,
+            page.locator(".pvd-spinner__mask-inner").first,
+            page.locator("pvd-loading-spinner").first,
+            page.locator(
+                ".pvd3-spinner-root > .pvd-spinner__spinner > .pvd-spinner__visual > div > .pvd-spinner__mask-inner"
+            ).first,
+        ]
+
+        async def wait_if_present(sign):
+            # Cheap probe first; only start the full wait when the spinner
+            # is actually in the page
+            if await sign.count() and await sign.is_visible():
+                await sign.wait_for(timeout=timeout, state="hidden")
+
+        await asyncio.gather(*[wait_if_present(sign) for sign in signs])
+
+
+def create_stock_dict(
+    ticker: str, quantity: float, last_price: float, value: float, stock_map: dict = None
+):
+    """
+    Creates a dictionary for a stock.
+    Stores it under its ticker in a dict if provided
+
+    Returns
+    -------
+    stock_dict (dict)
+        The dictionary for the stock with given info
+    """
+    # Build the dict for the stock
+    stock_dict = {
+        "ticker": ticker,
+        "quantity": quantity,
+        "last_price": last_price,
+        "value": value,
+    }
+    if stock_map is not None:
+        stock_map[ticker] = stock_dict
+    return stock_dict
+
+
+def validate_stocks(stocks: dict):
+    """
+    Checks a dict of stocks (keyed by ticker, each value a dictionary) for valid fields
+
+    Returns
+    -------
+    True
+        If stocks are none or valid
+    False
+        If fields are left empty or type are incorrect
+    """
+    if stocks is None:
+        return True
+    for stock in stocks.values():
+        ticker = stock.get("ticker")
+        quantity = stock.get("quantity")
+        last_price = stock.get("last_price")
+        value = stock.get("value")
+        # .get() turns missing fields into None, so one isinstance pass
+        # covers both the presence and the type checks. bool is excluded
+        # since it subclasses int.
+        if (
+            isinstance(ticker, str)
+            and isinstance(quantity, (int, float))
+            and isinstance(last_price, (int, float))
+            and isinstance(value, (int, float))
+            and not isinstance(quantity, bool)
+            and not isinstance(last_price, bool)
+            and not isinstance(value, bool)
+        ):
+            continue
+        print("Error in stocks list. Missing fields or incorrect types")
+        print(
+            "Create list of dictionaries with the following fields populated to initialize with given list"
+        )
+        print("ticker: str")
+        print("quantity: float")
+        print("last_price: float")
+        print("value: float")
+        return False
+    return True
+
 
 def fidelity_run(
-    orderObj: stockOrder, command=None, botObj=None, loop=None, FIDELITY_EXTERNAL=None
+    orderObj: stockOrder,
+    command=None,
+    botObj=None,
+    loop=None,
+    FIDELITY_EXTERNAL=None,
+    keep_open=False,
 ):
     """
     Entry point from main function. Gathers credentials and go through commands for
     each set of credentials found in the FIDELITY env variable
 
+    Pass keep_open=True to leave the logged in sessions and the shared browser
+    running after the command, so a follow-up command can reuse them instead of
+    logging in again.
+
     Returns:
         None
     """
     # Initialize .env file
     load_dotenv()
-    # Import Chase account
+    # Import Fidelity account
     if not os.getenv("FIDELITY") and FIDELITY_EXTERNAL is None:
         print("Fidelity not found, skipping...")
         return None
@@ -47,27 +1382,51 @@ def fidelity_run(
     # Set the functions to be run
     _, second_command = command
 
-    # For each set of login info, i.e. separate chase accounts
-    for account in accounts:
-        # Start at index 1 and go to how many logins we have
-        index = accounts.index(account) + 1
-        name = f"Fidelity {index}"
-        # Receive the chase broker class object and the AllAccount object related to it
-        fidelityobj = fidelity_init(
+    # Name each set of login info, i.e. separate fidelity accounts
+    # Start at index 1 and go to how many logins we have
+    names = [f"Fidelity {index}" for index in range(1, len(accounts) + 1)]
+
+    # Receive the fidelity broker class objects and the AllAccount objects
+    # related to them. With a Discord bot attached, 2FA codes arrive over
+    # Discord so the logins can run in parallel; with CLI input() prompts
+    # they have to stay serial.
+    def init_one(account, name):
+        return fidelity_init(
             account=account,
             name=name,
             headless=headless,
             botObj=botObj,
             loop=loop,
         )
-        if fidelityobj is not None:
-            # Store the Brokerage object for fidelity under 'fidelity' in the orderObj
-            orderObj.set_logged_in(fidelityobj, "fidelity")
-            if second_command == "_holdings":
-                fidelity_holdings(fidelityobj, name, loop=loop)
-            # Only other option is _transaction
-            else:
-                fidelity_transaction(fidelityobj, name, orderObj, loop=loop)
+
+    # Tear down the shared browser even if a login or command blows up,
+    # otherwise its process outlives the run
+    try:
+        if botObj is not None and loop is not None:
+            with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+                fidelity_objs = list(executor.map(init_one, accounts, names))
+        else:
+            fidelity_objs = [
+                init_one(account, name) for account, name in zip(accounts, names)
+            ]
+
+        # Run the command against each logged in account
+        for name, fidelityobj in zip(names, fidelity_objs):
+            if fidelityobj is not None:
+                # Store the Brokerage object for fidelity under 'fidelity' in the orderObj
+                orderObj.set_logged_in(fidelityobj, "fidelity")
+                if second_command == "_holdings":
+                    fidelity_holdings(fidelityobj, name, loop=loop, keep_open=keep_open)
+                # Only other option is _transaction
+                else:
+                    fidelity_transaction(
+                        fidelityobj, name, orderObj, loop=loop, keep_open=keep_open
+                    )
+    finally:
+        # All accounts are done, tear down the shared browser unless the
+        # sessions are being kept for another command
+        if not keep_open:
+            _run_async(shutdown())
     return None
 
 
@@ -94,26 +1453,34 @@ def fidelity_init(account: str, name: str, headless=True, botObj=None, loop=None
         # Split the login into into separate items
         account = account.split(":")
         # Create a Fidelity browser object
-        fidelity_browser = fidelity.FidelityAutomation(
-            headless=headless, title=name, profile_path="./creds"
+        fidelity_browser = _run_async(
+            FidelityAutomation.create(
+                headless=headless, title=name, profile_path="./creds"
+            )
         )
 
         # Log into fidelity
-        step_1, step_2 = fidelity_browser.login(
-            account[0], account[1], account[2] if len(account) > 2 else None
+        step_1, step_2 = _run_async(
+            fidelity_browser.login(
+                account[0], account[1], account[2] if len(account) > 2 else None
+            )
         )
-        # If 2FA is present, ask for code
+        # If 2FA is present, ask for code. Hold the prompt lock so parallel
+        # logins ask one at a time and each gets its own code
         if step_1 and not step_2:
-            if botObj is None and loop is None:
-                fidelity_browser.login_2FA(input("Enter code: "))
-            else:
-                # Should wait for 60 seconds before timeout
-                sms_code = asyncio.run_coroutine_threadsafe(
-                    getOTPCodeDiscord(botObj, name, code_len=6, loop=loop), loop
-                ).result()
-                if sms_code is None:
-                    raise Exception(f"{name} No SMS code found", loop)
-                fidelity_browser.login_2FA(sms_code)
+            with _twofa_prompt_lock:
+                if botObj is None and loop is None:
+                    _run_async(
+                        fidelity_browser.login_2FA(input("Enter code: "))
+                    )
+                else:
+                    # Should wait for 60 seconds before timeout
+                    sms_code = asyncio.run_coroutine_threadsafe(
+                        getOTPCodeDiscord(botObj, name, code_len=6, loop=loop), loop
+                    ).result()
+                    if sms_code is None:
+                        raise Exception(f"{name} No SMS code found", loop)
+                    _run_async(fidelity_browser.login_2FA(sms_code))
         elif not step_1:
             raise Exception(
                 f"{name}: Login Failed. Got Error Page: Current URL: {fidelity_browser.page.url}"
@@ -121,9 +1488,14 @@ def fidelity_init(account: str, name: str, headless=True, botObj=None, loop=None
 
         # By this point, we should be logged in so save the driver
         fidelity_obj.set_logged_in_object(name, fidelity_browser)
+        # Persist the session cookies now so the next run can warm start
+        # even if the browser is never closed cleanly
+        _run_async(fidelity_browser.save_storage_state())
 
         # Getting account numbers, names, and balances
-        account_dict = fidelity_browser.getAccountInfo()
+        account_dict = _run_async(
+            fidelity_browser.getAccountInfo()
+        )
 
         if account_dict is None:
             raise Exception(f"{name}: Error getting account info")
@@ -141,7 +1513,7 @@ def fidelity_init(account: str, name: str, headless=True, botObj=None, loop=None
         return None
 
 
-def fidelity_holdings(fidelity_o: Brokerage, name: str, loop=None):
+def fidelity_holdings(fidelity_o: Brokerage, name: str, loop=None, keep_open=False):
     """
     Retrieves the holdings per account by reading from the previously downloaded positions csv file.
     Prints holdings for each account and provides a summary if the user has more than 5 accounts.
@@ -151,37 +1523,38 @@ def fidelity_holdings(fidelity_o: Brokerage, name: str, loop=None):
         FidelityAutomation class object that is logged into fidelity
         name: str: The name of this brokerage object (ex: Fidelity 1)
         loop: AbstractEventLoop: The event loop to be used
+        keep_open: bool: Leave the logged in browser context running so another
+        command can reuse the session instead of logging in again
 
     Returns:
         None
     """
 
     # Get the browser back from the fidelity object
-    fidelity_browser: fidelity.FidelityAutomation = fidelity_o.get_logged_in_objects(
-        name
-    )
+    fidelity_browser: FidelityAutomation = fidelity_o.get_logged_in_objects(name)
     account_dict = fidelity_browser.account_dict
     for account_number in account_dict:
-
-        for d in account_dict[account_number]["stocks"]:
-            # Append the ticker to the appropriate account
-            fidelity_o.set_holdings(
-                parent_name=name,
-                account_name=account_number,
-                stock=d["ticker"],
-                quantity=d["quantity"],
-                price=d["last_price"],
-            )
+        # Hand the whole account's tickers over at once; set_holdings_bulk
+        # sorts a single time instead of after every stock
+        fidelity_o.set_holdings_bulk(
+            parent_name=name,
+            account_name=account_number,
+            stocks={
+                ticker: {"quantity": d["quantity"], "price": d["last_price"]}
+                for ticker, d in account_dict[account_number]["stocks"].items()
+            },
+        )
 
     # Print to console and to discord
     printHoldings(fidelity_o, loop)
 
-    # Close browser
-    fidelity_browser.close_browser()
+    # Close browser unless the session is being kept for another command
+    if not keep_open:
+        _run_async(fidelity_browser.close_browser())
 
 
 def fidelity_transaction(
-    fidelity_o: Brokerage, name: str, orderObj: stockOrder, loop=None
+    fidelity_o: Brokerage, name: str, orderObj: stockOrder, loop=None, keep_open=False
 ):
     """
     Using the Brokerage object, call FidelityAutomation.transaction() and process its' return
@@ -192,62 +1565,79 @@ def fidelity_transaction(
         name: str: The name of this brokerage object (ex: Fidelity 1)
         orderObj: stockOrder: The stock object used for storing stocks to buy or sell
         loop: AbstractEventLoop: The event loop to be used
+        keep_open: bool: Leave the logged in browser context running so another
+        command can reuse the session instead of logging in again
 
     Returns:
         None
     """
 
     # Get the driver
-    fidelity_browser: fidelity.FidelityAutomation = fidelity_o.get_logged_in_objects(
-        name
-    )
+    fidelity_browser: FidelityAutomation = fidelity_o.get_logged_in_objects(name)
     # Get full list of accounts in case some had no holdings
-    fidelity_browser.get_list_of_accounts()
+    _run_async(fidelity_browser.get_list_of_accounts())
+    # The order parameters don't change per stock or account, so read them
+    # off the order object once
+    action = orderObj.get_action()
+    amount = orderObj.get_amount()
+    dry = orderObj.get_dry()
+    selling = action.lower() == "sell"
+    # Mask each account number one time instead of once per stock
+    masked_accounts = {
+        account_number: maskString(account_number)
+        for account_number in fidelity_browser.account_dict
+    }
     # Go trade
     for stock in orderObj.get_stocks():
         # Say what we are doing
         printAndDiscord(
-            f"{name}: {orderObj.get_action()}ing {orderObj.get_amount()} of {stock}",
+            f"{name}: {action}ing {amount} of {stock}",
             loop,
         )
-        # Reload the page incase we were trading before
-        fidelity_browser.page.reload()
-        for account_number in fidelity_browser.account_dict:
-            # If we are selling, check to see if the account has the stock to sell
-            if (
-                orderObj.get_action().lower() == "sell"
-                and stock not in fidelity_browser.get_stocks_in_account(account_number)
-            ):
-                # Doesn't have it, skip account
-                continue
-
-            # Go trade for all accounts for that stock
-            success, error_message = fidelity_browser.transaction(
+        # No reload needed between stocks; transaction resets the order
+        # ticket in place when the page is already on the trade URL
+        # If we are selling, only take the accounts that have the stock to sell
+        accounts = [
+            account_number
+            for account_number in fidelity_browser.account_dict
+            if not (
+                selling
+                and stock
+                not in fidelity_browser.account_dict[account_number]["stocks"]
+            )
+        ]
+
+        # Go trade for all accounts for that stock, concurrently in tabs
+        results = _run_async(
+            fidelity_browser.transact_all_accounts(
                 stock,
-                orderObj.get_amount(),
-                orderObj.get_action(),
-                account_number,
-                orderObj.get_dry(),
+                amount,
+                action,
+                accounts,
+                dry,
             )
-            print_account = maskString(account_number)
+        )
+        # Itemize errors but roll the successes for this stock into a single
+        # message, so Discord gets one confirmation instead of one per account
+        successes = []
+        for account_number, (success, error_message) in results.items():
+            print_account = masked_accounts[account_number]
             # Report error if occurred
             if not success:
                 printAndDiscord(
                     f"{name} account {print_account}: Error: {error_message}",
                     loop,
                 )
-            # Print test run confirmation if test run
-            elif success and orderObj.get_dry():
-                printAndDiscord(
-                    f"DRY: {name} account {print_account}: {orderObj.get_action()} {orderObj.get_amount()} shares of {stock}",
-                    loop,
-                )
-            # Print real run confirmation if real run
-            elif success and not orderObj.get_dry():
-                printAndDiscord(
-                    f"{name} account {print_account}: {orderObj.get_action()} {orderObj.get_amount()} shares of {stock}",
-                    loop,
-                )
+            else:
+                successes.append(print_account)
+        if successes:
+            # Prefix test run confirmations with DRY
+            prefix = "DRY: " if dry else ""
+            printAndDiscord(
+                f"{prefix}{name} accounts {', '.join(successes)}: {action} {amount} shares of {stock}",
+                loop,
+            )
 
-    # Close browser
-    fidelity_browser.close_browser()
+    # Close browser unless the session is being kept for another command
+    if not keep_open:
+        _run_async(fidelity_browser.close_browser())
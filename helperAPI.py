@@ -257,6 +257,32 @@ class Brokerage:
             )
         )
 
+    def set_holdings_bulk(self, parent_name: str, account_name: str, stocks: dict):
+        # Same as calling set_holdings per stock, but resolves the account
+        # dict once and sorts once at the end instead of on every insert.
+        # stocks is keyed by ticker with "quantity" and "price" per entry.
+        if parent_name not in self.__holdings:
+            self.__holdings[parent_name] = {}
+        if account_name not in self.__holdings[parent_name]:
+            self.__holdings[parent_name][account_name] = {}
+        account_holdings = self.__holdings[parent_name][account_name]
+        for stock, info in stocks.items():
+            quantity = info["quantity"]
+            price = info["price"]
+            if isinstance(quantity, str) and quantity.lower() == "n/a":
+                quantity = 0
+            if isinstance(price, str) and price.lower() == "n/a":
+                price = 0
+            account_holdings[stock] = {
+                "quantity": float(quantity),
+                "price": round(float(price), 2),
+                "total": round(float(quantity) * float(price), 2),
+            }
+        # Alphabetize by stock
+        self.__holdings[parent_name][account_name] = dict(
+            sorted(account_holdings.items(), key=lambda item: item[0])
+        )
+
     def set_account_totals(self, parent_name: str, account_name: str, total: float):
         if isinstance(total, str):
             total = total.replace(",", "").replace("$", "").strip()